@@ -12,16 +12,26 @@ Changes from v1
 Usage: `python -m flask run --reload`
 """
 from __future__ import annotations
-import json, itertools, sys
+import itertools, json, multiprocessing, os, sys, threading, time
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Set, Dict, Iterable
+from typing import List, Dict, Iterable, Tuple
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template
+
+try:                      # optional: C JSON parser, parses bytes directly
+    import orjson
+except ImportError:       # stdlib fallback below
+    orjson = None
 
 app = Flask(__name__)
 
 DATA_FILE = Path("all_sections.json")
 MAX_SOLNS = 50   # hard cap so a huge search doesn't hang the server
+TIME_BUDGET = 0.25         # seconds of wall clock a single search may take before it is cut short
+DAY_CODES = "UMTWRFS"      # bit i of a day mask ⇔ DAY_CODES[i]
+SLOTS_PER_DAY = 24 * 60    # 1-minute slots keep clash tests exact for :05 / :25 starts
+PARALLEL = os.environ.get("PARALLEL") == "1"   # fan the search out over a process pool
 
 # ───────────────────────────────────────── helper fns ─────────────────────────────────────────
 
@@ -29,59 +39,292 @@ def _mins(t: str) -> int:
     h, m = map(int, t.split(":"))
     return 60 * h + m
 
+def ojson(obj, status: int = 200) -> Response:
+    """`jsonify` replacement that encodes with orjson when available."""
+    if orjson is None:
+        resp = jsonify(obj)
+        resp.status_code = status
+        return resp
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+def _day_mask(days: Iterable[str]) -> int:
+    """Fold day letters into a DAY_CODES bitmask (unknown characters are ignored)."""
+    return sum(1 << i for i, d in enumerate(DAY_CODES) if d in days)
+
 class Section:
-    """Minimal immutable view of a course section (extra keys ignored)."""
+    """Minimal immutable view of a course section."""
 
-    def __init__(self, course: str, crn: int, days: str, start: str, end: str, **_ignored):
+    __slots__ = ("course", "crn", "days", "start", "end", "day_mask", "week_mask",
+                 "_line", "_dict")
+
+    def __init__(self, course: str, crn: int, days: str, start: str, end: str):
         self.course = course
         self.crn = crn
-        self.days: Set[str] = set(days)
+        self.days = "".join(sorted(days))   # canonical order, sorted once; every display form reuses it
         self.start = _mins(start)
         self.end   = _mins(end)
+        self.day_mask = _day_mask(self.days)
+        # one bit per minute of the week the section occupies ⇒ a clash is a single AND
+        slots = (1 << self.end) - (1 << self.start)
+        self.week_mask = 0
+        for i in range(len(DAY_CODES)):
+            if self.day_mask >> i & 1:
+                self.week_mask |= slots << (i * SLOTS_PER_DAY)
+        # display forms depend only on the section, so build them once at load time
+        hhmm_start = f"{self.start//60:02d}:{self.start%60:02d}"
+        hhmm_end   = f"{self.end//60:02d}:{self.end%60:02d}"
+        self._line = f"{course}  CRN:{crn}  {self.days}  {hhmm_start}-{hhmm_end}"
+        self._dict = {
+            "course": course,
+            "crn": crn,
+            "days": self.days,
+            "start": hhmm_start,
+            "end":   hhmm_end,
+        }
 
     def clashes(self, other: "Section") -> bool:
-        return bool((self.days & other.days) and (self.start < other.end and other.start < self.end))
+        return (self.week_mask & other.week_mask) != 0
 
     def to_dict(self):
-        return {
-            "course": self.course,
-            "crn": self.crn,
-            "days": "".join(sorted(self.days)),
-            "start": f"{self.start//60:02d}:{self.start%60:02d}",
-            "end":   f"{self.end//60:02d}:{self.end%60:02d}",
-        }
+        return self._dict
 
 # ───────────────────────────────────── data loading ─────────────────────────────────────────
 
 def load_sections() -> Dict[str, List[Section]]:
     if not DATA_FILE.exists():
         sys.exit("all_sections.json missing – run scrape_njit.py first.")
-    raw = json.loads(DATA_FILE.read_text())
-    return {c: [Section(c, **d) for d in lst] for c, lst in raw.items()}
+    raw = orjson.loads(DATA_FILE.read_bytes()) if orjson else json.loads(DATA_FILE.read_text())
+    # pick the solver's fields explicitly; location/instructor/etc. are not used here
+    return {c: [Section(c, d["crn"], d["days"], d["start"], d["end"]) for d in lst]
+            for c, lst in raw.items()}
 
-SECTIONS = load_sections()
+SECTIONS = load_sections()   # parsed once at import; `gunicorn --preload` shares it copy-on-write across workers
 
 # ───────────────────────────── schedule generation ──────────────────────────────────────────
 
-def find_schedules(courses: List[str], start_ok: int, end_ok: int, days_ok: Set[str]) -> Iterable[List[Section]]:
-    pools: List[List[Section]] = []
+SectionColumns = Tuple[Tuple[Section, ...], Tuple[int, ...]]   # (sections, their week masks) side by side
+
+@lru_cache(maxsize=4096)
+def _filtered(course: str, days_mask: int, start_ok: int, end_ok: int) -> SectionColumns:
+    """Sections of *course* that fit the day/time window (memoised across requests)."""
+    keep = tuple(sec for sec in SECTIONS[course]
+                 if not (sec.day_mask & ~days_mask) and sec.start >= start_ok and sec.end <= end_ok)
+    return keep, tuple(sec.week_mask for sec in keep)
+
+@lru_cache(maxsize=4096)
+def _compat(course: str, other: str, days_mask: int, start_ok: int, end_ok: int) -> Tuple[int, ...]:
+    """Row k is a bitset over *other*'s filtered pool: bit x set ⇔ section k of *course* fits beside section x."""
+    _, masks = _filtered(course, days_mask, start_ok, end_ok)
+    _, other_masks = _filtered(other, days_mask, start_ok, end_ok)
+    return tuple(sum(1 << x for x, om in enumerate(other_masks) if not m & om) for m in masks)
+
+Compat = Dict[Tuple[int, int], Tuple[int, ...]]
+
+class _TimeoutSentinel(Exception):
+    """Raised out of the search once its TIME_BUDGET is spent; results already yielded stand."""
+
+class _Cancelled(Exception):
+    """Raised inside a pool task once the search that queued it has released its _LIVE slot."""
+
+class _Budget:
+    """Allowance of search time, polled every 1024 expansions to keep `time.monotonic` off the hot path.
+
+    Only time spent searching counts: the owner brackets each hand-off of a result with pause()/resume(),
+    so a slow consumer (e.g. a streaming client) does not eat into the budget.
+    """
+
+    __slots__ = ("left", "since", "ticks", "slot", "ticket")
+
+    def __init__(self, seconds: float, slot: int = -1, ticket: int = 0):
+        self.left = seconds
+        self.since = time.monotonic()
+        self.ticks = 0
+        self.slot = slot       # pool tasks only: keep going while _LIVE[slot] still holds our ticket
+        self.ticket = ticket
+
+    def tick(self):
+        self.ticks += 1
+        if not self.ticks & 1023:
+            if self.slot >= 0 and _LIVE[self.slot] != self.ticket:
+                raise _Cancelled
+            if time.monotonic() - self.since > self.left:
+                raise _TimeoutSentinel
+
+    def pause(self):
+        self.left -= time.monotonic() - self.since
+
+    def resume(self):
+        self.since = time.monotonic()
+
+def _branch(alive: Dict[int, int], compat: Compat) -> list:
+    """Stack frame for the fail-first pool of *alive*: [pool, untried candidates, other pools with their rows]."""
+    j = min(alive, key=lambda p: alive[p].bit_count())
+    return [j, alive[j], [(p, bits, compat[j, p]) for p, bits in alive.items() if p != j]]
+
+def _search(alive: Dict[int, int], picks: List[int], compat: Compat, budget: _Budget) -> Iterable[List[int]]:
+    """Iterative forward-checking DFS over pool-index bitsets; yields one index per pool for each clash-free pick.
+
+    *alive* maps every still-unassigned pool to the bitset of its surviving candidates. Each placement
+    prunes those with one AND against a precomputed compatibility row, a branch dies as soon as one of
+    them empties, and the next pool branched on is always the one with the fewest survivors. Pruned
+    sets live in the explicit frame stack, so backtracking is just a pop.
+    """
+    if not alive:
+        yield picks[:]
+        return
+    stack = [_branch(alive, compat)]
+    while stack:
+        budget.tick()
+        frame = stack[-1]
+        j, cand, rest = frame
+        if not cand:
+            stack.pop()
+            continue
+        low = cand & -cand
+        frame[1] = cand ^ low
+        k = low.bit_length() - 1
+        picks[j] = k
+        if not rest:                      # a single course was asked for
+            yield picks[:]
+            continue
+        pruned: Dict[int, int] = {}
+        for p, bits, rows in rest:
+            keep = bits & rows[k]
+            if not keep:
+                break
+            pruned[p] = keep
+        else:
+            if len(pruned) > 1:
+                stack.append(_branch(pruned, compat))
+                continue
+            # last pool: every survivor completes a schedule, so emit them without another frame
+            (q, last), = pruned.items()
+            while last:
+                low = last & -last
+                last ^= low
+                picks[q] = low.bit_length() - 1
+                yield picks[:]
+
+def _solve(sizes: List[int], compat: Compat, budget: _Budget) -> Iterable[List[int]]:
+    alive = {p: (1 << size) - 1 for p, size in enumerate(sizes)}
+    return _search(alive, [0] * len(sizes), compat, budget)
+
+def _solve_fixing_first(k: int, pivot: int, sizes: List[int], compat: Compat, limit: int,
+                        deadline: float, slot: int, ticket: int) -> Tuple[List[List[int]], bool]:
+    """Worker task: every solution (up to *limit*) whose *pivot* pool uses candidate *k*, plus a timed-out flag.
+
+    *deadline* is a `time.monotonic` value, which is system-wide, so it holds across processes. Pool
+    workers never wait on the consumer, so for them wall-clock time is search time.
+    The task gives up as soon as its search releases *slot*, so leftover subtrees don't tie up the pool.
+    On timeout the schedules found so far are still returned, flagged, so the caller can keep them.
+    """
+    if _LIVE[slot] != ticket:
+        return [], False
+    if time.monotonic() > deadline:
+        return [], True
+    alive = {p: ((1 << size) - 1) & compat[pivot, p][k] for p, size in enumerate(sizes) if p != pivot}
+    if not all(alive.values()):
+        return [], False
+    picks = [0] * len(sizes)
+    picks[pivot] = k
+    found: List[List[int]] = []
+    try:
+        for sol in _search(alive, picks, compat, _Budget(deadline - time.monotonic(), slot, ticket)):
+            found.append(sol)
+            if len(found) >= limit:
+                break
+    except _Cancelled:
+        return [], False
+    except _TimeoutSentinel:
+        return found, True
+    return found, False
+
+def find_schedules(courses: List[str], start_ok: int, end_ok: int, days_ok: Iterable[str]) -> Iterable[List[Section]]:
+    """Yield up to MAX_SOLNS clash-free schedules; raises _TimeoutSentinel once TIME_BUDGET runs out.
+
+    The budget counts time spent searching, not time the caller spends between pulls. Everything yielded
+    before the raise is valid, so callers keep it and flag the result as cut short.
+    """
+    budget = _Budget(TIME_BUDGET)
+    days_mask = _day_mask(days_ok)
+    domains: List[Tuple[Section, ...]] = []
     for c in courses:
         if c not in SECTIONS:
             raise ValueError(f"Unknown course: {c}")
-        pools.append(SECTIONS[c])
+        domains.append(_filtered(c, days_mask, start_ok, end_ok)[0])
+    compat = {(i, j): _compat(a, b, days_mask, start_ok, end_ok)
+              for i, a in enumerate(courses) for j, b in enumerate(courses) if i != j}
+
+    sizes = [len(secs) for secs in domains]
+    pool = _pool()
+    slot = _claim_slot() if pool is not None and len(sizes) > 1 else None
+    if slot is not None:
+        # one independent subtree per section of the biggest course; results arrive in completion order
+        pivot = max(range(len(sizes)), key=sizes.__getitem__)
+        job = partial(_solve_fixing_first, pivot=pivot, sizes=sizes, compat=compat, limit=MAX_SOLNS,
+                      deadline=time.monotonic() + budget.left, slot=slot, ticket=_LIVE[slot])
+        # job carries the whole compat table: send it per chunk (about 4 per worker), not per task
+        chunk = max(1, -(-sizes[pivot] // (4 * (os.cpu_count() or 1))))
+        batches = pool.imap_unordered(job, range(sizes[pivot]), chunk)
+    else:
+        batches = [(_solve(sizes, compat, budget), False)]   # the sequential search raises on timeout itself
 
     count = 0
-    for combo in itertools.product(*pools):
-        if any(sec.days - days_ok for sec in combo):
-            continue
-        if any(sec.start < start_ok or sec.end > end_ok for sec in combo):
-            continue
-        if any(a.clashes(b) for a, b in itertools.combinations(combo, 2)):
-            continue
-        yield list(combo)
-        count += 1
-        if count >= MAX_SOLNS:
-            break
+    timed_out = False
+    try:
+        for found, cut_short in batches:
+            # a task that ran out of time still hands back its partial results; the rest drain quickly,
+            # since tasks starting past the deadline return at once
+            timed_out |= cut_short
+            for picks in found:
+                budget.pause()
+                yield [secs[k] for secs, k in zip(domains, picks)]
+                budget.resume()
+                count += 1
+                if count >= MAX_SOLNS:
+                    return
+    finally:
+        if slot is not None:
+            _release_slot(slot)   # cap reached, timed out or the caller walked away: cancel queued subtrees
+    if timed_out:
+        raise _TimeoutSentinel
+
+LIVE_SLOTS = 256   # parallel searches one process can have in flight; extra ones run sequentially
+
+_POOL = None
+_POOL_PID = None
+_LIVE = None       # shared slot -> ticket table, inherited by the pool's workers at fork
+_FREE_SLOTS: List[int] = []
+_SLOT_LOCK = threading.Lock()
+_TICKETS = itertools.count(1)
+
+def _pool():
+    """Per-process worker pool, created lazily so `gunicorn --preload` workers never share the master's."""
+    global _POOL, _POOL_PID, _LIVE, _FREE_SLOTS
+    if PARALLEL and _POOL_PID != os.getpid():
+        with _SLOT_LOCK:   # concurrent first requests must not each build a pool or reset the slot table
+            if _POOL_PID != os.getpid():
+                ctx = multiprocessing.get_context("fork")
+                _LIVE = ctx.RawArray("Q", LIVE_SLOTS)   # must exist before the workers fork
+                _FREE_SLOTS = list(range(LIVE_SLOTS))
+                _POOL = ctx.Pool(processes=os.cpu_count())
+                _POOL_PID = os.getpid()
+    return _POOL
+
+def _claim_slot():
+    """Reserve a _LIVE slot under a fresh ticket for one parallel search (None if all are busy)."""
+    with _SLOT_LOCK:
+        if not _FREE_SLOTS:
+            return None
+        slot = _FREE_SLOTS.pop()
+        _LIVE[slot] = next(_TICKETS)
+        return slot
+
+def _release_slot(slot: int):
+    """Clear *slot*, which makes every still-queued or running task of its search bail out."""
+    with _SLOT_LOCK:
+        _LIVE[slot] = 0
+        _FREE_SLOTS.append(slot)
 
 # ─────────────────────────────────────── HTML (updated for NJIT branding) ─────────────────────────────────────────────
 TEMPLATE = """
@@ -198,12 +441,14 @@ TEMPLATE = """
       </form>
 
       {% if schedules is not none %}
-        <h2>{{ schedules|length }} schedule{{ 's' if schedules|length!=1 else '' }} found{% if schedules|length == max_solns %} (showing first {{ max_solns }}){% endif %}</h2>
+        <h2>{{ schedules|length }} schedule{{ 's' if schedules|length!=1 else '' }} found{% if schedules|length == max_solns %} (showing first {{ max_solns }}){% elif truncated %} (search stopped at the time limit){% endif %}</h2>
         <div class="schedules">
           {% if schedules %}
             {% for sched in schedules %}
               <pre class="schedule"><strong>Schedule #{{ loop.index }}</strong>\n{{ sched }}</pre>
             {% endfor %}
+          {% elif truncated %}
+            <p><em>No schedule found within the time limit; try fewer courses or a wider window.</em></p>
           {% else %}
             <p><em>No schedule fits those constraints.</em></p>
           {% endif %}
@@ -214,30 +459,31 @@ TEMPLATE = """
 </body>
 </html>
 """
+# compiled once through Flask's Jinja env (keeps url_for); render_template_string would re-parse per request
+PAGE = app.jinja_env.from_string(TEMPLATE)
 
 # ───────────────────────────────────────── routes ───────────────────────────────────────────
 @app.route("/", methods=["GET", "POST"])
 
 def index():
     rendered_schedules = None
+    truncated = False
     if request.method == "POST":
         try:
             courses = request.form["courses"].upper().split()
             s_ok = _mins(request.form["start"])
             e_ok = _mins(request.form["end"])
-            days = set(request.form["days"].upper())
-            sols = list(find_schedules(courses, s_ok, e_ok, days))
-            rendered_schedules = [
-                "\n".join(
-                    f"{sec.course}  CRN:{sec.crn}  {''.join(sorted(sec.days))}  "
-                    f"{sec.start//60:02d}:{sec.start%60:02d}-{sec.end//60:02d}:{sec.end%60:02d}"
-                    for sec in schedule
-                )
-                for schedule in sols
-            ]
+            days = request.form["days"].upper()
+            sols = []
+            try:
+                for sched in find_schedules(courses, s_ok, e_ok, days):
+                    sols.append(sched)
+            except _TimeoutSentinel:
+                truncated = True
+            rendered_schedules = ["\n".join(sec._line for sec in schedule) for schedule in sols]
         except ValueError as ve:
             rendered_schedules = [str(ve)]
-    return render_template_string(TEMPLATE, schedules=rendered_schedules, max_solns=MAX_SOLNS)
+    return render_template(PAGE, schedules=rendered_schedules, max_solns=MAX_SOLNS, truncated=truncated)
 
 
 @app.route("/api/solve", methods=["POST"])
@@ -248,15 +494,25 @@ def api_solve():
         courses = [c.upper() for c in data["courses"]]
         s_ok = _mins(data["start"])
         e_ok = _mins(data["end"])
-        days = set(data["days"].upper())
+        days = data["days"].upper()
     except (KeyError, TypeError, ValueError):
-        return jsonify({"error": "malformed-request"}), 400
+        return ojson({"error": "malformed-request"}, 400)
 
-    solutions = [ [s.to_dict() for s in sched]
-                  for sched in find_schedules(courses, s_ok, e_ok, days) ]
-    if solutions:
-        return jsonify(solutions)
-    return jsonify({"error": "no-schedule"}), 404
+    # buffered (at most MAX_SOLNS short lists) so the response can say whether the budget cut it short
+    solutions = []
+    truncated = False
+    try:
+        for sched in find_schedules(courses, s_ok, e_ok, days):
+            solutions.append([s._dict for s in sched])
+    except _TimeoutSentinel:
+        truncated = True
+    if not solutions:
+        if truncated:
+            return ojson({"error": "timeout"}, 503)   # gave up, which is not proof that nothing fits
+        return ojson({"error": "no-schedule"}, 404)
+    resp = ojson(solutions)
+    resp.headers["X-Schedules-Truncated"] = "true" if truncated else "false"
+    return resp
 
 # ────────────────────────────────────── run app ─────────────────────────────────────────────
 if __name__ == "__main__":